@@ -1,9 +1,9 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+from sim import aging_rates, final_pct_target_1, pct_of_total, simulate_aging
+
 st.set_page_config(page_title="CIS Metrics Simulator", page_icon="📊", layout="wide")
 
 st.title("📊 CIS Metrics Prediction Simulator")
@@ -32,7 +32,9 @@ target_2_pct = st.sidebar.number_input("Target % for Age Target #2", value=98.0,
 
 # Current State Inputs
 st.sidebar.subheader("Current State")
-total_open = st.sidebar.number_input("Total Open Complaints", value=200, min_value=0, step=10)
+# Capped so bucket counts (open + up to 52 weeks of intake) stay within the int32 simulation
+total_open = st.sidebar.number_input("Total Open Complaints", value=200, min_value=0,
+                                     max_value=1_000_000, step=10)
 
 pct_meeting_target_1 = st.sidebar.slider(
     f"Current % Meeting Target #1 (< {target_1_days} days)",
@@ -72,136 +74,40 @@ st.sidebar.subheader("Simulation Settings")
 weeks_to_simulate = st.sidebar.slider("Weeks to Simulate", 4, 52, 26)
 
 
-# --- Simulation Logic ---
-def simulate_aging(total_open, bucket_1_init, bucket_2_init, bucket_3_init,
-                   weekly_opened, weekly_closed, closure_strategy, weeks,
-                   target_1_days, target_2_days):
-    """
-    Simulate complaint aging over time with dynamic age targets.
-
-    Buckets:
-    - Bucket 1: 0 to target_1_days
-    - Bucket 2: target_1_days+1 to target_2_days
-    - Bucket 3: > target_2_days
-    """
-
-    bucket_1 = bucket_1_init
-    bucket_2 = bucket_2_init
-    bucket_3 = bucket_3_init
-
-    # Dynamic aging rates
-    rate_1_to_2 = min(1.0, 7 / target_1_days)
-    rate_2_to_3 = min(1.0, 7 / (target_2_days - target_1_days))
-
-    results = []
-
-    for week in range(weeks + 1):
-        total = bucket_1 + bucket_2 + bucket_3
-
-        if total > 0:
-            pct_target_1 = (bucket_1 / total) * 100
-            pct_target_2 = ((bucket_1 + bucket_2) / total) * 100
-        else:
-            pct_target_1 = 100
-            pct_target_2 = 100
-
-        results.append({
-            'week': week,
-            'total_open': total,
-            'bucket_1': bucket_1,
-            'bucket_2': bucket_2,
-            'bucket_3': bucket_3,
-            'pct_meeting_target_1': pct_target_1,
-            'pct_meeting_target_2': pct_target_2
-        })
-
-        if week < weeks:
-            # Age existing complaints
-            aging_to_bucket_2 = int(bucket_1 * rate_1_to_2)
-            aging_to_bucket_3 = int(bucket_2 * rate_2_to_3)
-
-            bucket_1 -= aging_to_bucket_2
-            bucket_2 += aging_to_bucket_2 - aging_to_bucket_3
-            bucket_3 += aging_to_bucket_3
-
-            # Add new complaints (all start in bucket 1)
-            bucket_1 += weekly_opened
-
-            # Close complaints based on strategy
-            to_close = min(weekly_closed, bucket_1 + bucket_2 + bucket_3)
-
-            if closure_strategy == "Oldest First (Prioritize Aging)":
-                close_from_3 = min(to_close, bucket_3)
-                bucket_3 -= close_from_3
-                to_close -= close_from_3
-
-                close_from_2 = min(to_close, bucket_2)
-                bucket_2 -= close_from_2
-                to_close -= close_from_2
-
-                bucket_1 -= to_close
-
-            elif closure_strategy == "Newest First (FIFO)":
-                close_from_1 = min(to_close, bucket_1)
-                bucket_1 -= close_from_1
-                to_close -= close_from_1
-
-                close_from_2 = min(to_close, bucket_2)
-                bucket_2 -= close_from_2
-                to_close -= close_from_2
-
-                bucket_3 -= to_close
-
-            else:  # Mixed
-                total_current = bucket_1 + bucket_2 + bucket_3
-                if total_current > 0:
-                    close_1 = int(to_close * bucket_1 / total_current)
-                    close_2 = int(to_close * bucket_2 / total_current)
-                    close_3 = to_close - close_1 - close_2
-
-                    bucket_1 -= min(close_1, bucket_1)
-                    bucket_2 -= min(close_2, bucket_2)
-                    bucket_3 -= min(close_3, bucket_3)
-
-            # Ensure no negative values
-            bucket_1 = max(0, bucket_1)
-            bucket_2 = max(0, bucket_2)
-            bucket_3 = max(0, bucket_3)
-
-    return pd.DataFrame(results)
-
-
-# Run simulation
+# --- Run Simulation ---
 df = simulate_aging(total_open, bucket_1_count, bucket_2_count, bucket_3_count,
                     weekly_opened, weekly_closed, closure_strategy, weeks_to_simulate,
                     target_1_days, target_2_days)
 
 # --- Main Dashboard ---
+pct1_arr = df['pct_meeting_target_1'].to_numpy()
+pct2_arr = df['pct_meeting_target_2'].to_numpy()
+total_arr = df['total_open'].to_numpy()
+
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    current_pct_1 = df.iloc[0]['pct_meeting_target_1']
-    final_pct_1 = df.iloc[-1]['pct_meeting_target_1']
+    current_pct_1 = pct1_arr[0]
+    final_pct_1 = pct1_arr[-1]
     delta_1 = final_pct_1 - current_pct_1
     st.metric(f"% < {target_1_days} Days (Final)", f"{final_pct_1:.1f}%", f"{delta_1:+.1f}%")
 
 with col2:
-    current_pct_2 = df.iloc[0]['pct_meeting_target_2']
-    final_pct_2 = df.iloc[-1]['pct_meeting_target_2']
+    current_pct_2 = pct2_arr[0]
+    final_pct_2 = pct2_arr[-1]
     delta_2 = final_pct_2 - current_pct_2
     st.metric(f"% < {target_2_days} Days (Final)", f"{final_pct_2:.1f}%", f"{delta_2:+.1f}%")
 
 with col3:
-    final_total = df.iloc[-1]['total_open']
+    final_total = int(total_arr[-1])
     delta_total = final_total - total_open
-    st.metric("Total Open (Final)", int(final_total), f"{delta_total:+.0f}")
+    st.metric("Total Open (Final)", final_total, f"{delta_total:+.0f}")
 
 with col4:
-    green_week = None
-    for _, row in df.iterrows():
-        if row['pct_meeting_target_1'] >= target_1_pct:
-            green_week = int(row['week'])
-            break
+    # First week at or above target (argmax returns the first True); compared in
+    # float64 from the counts because the stored % column is float32
+    mask = pct_of_total(df['bucket_1'].to_numpy(), total_arr) >= target_1_pct
+    green_week = int(df['week'].iat[mask.argmax()]) if mask.any() else None
 
     if green_week is not None:
         st.metric(f"Weeks to Green ({target_1_days}d)", f"{green_week} weeks", "✅")
@@ -211,67 +117,86 @@ with col4:
 # --- Charts ---
 st.subheader("📈 Metric Projections")
 
-fig = make_subplots(rows=2, cols=2,
-                    subplot_titles=(f"% < {target_1_days} Days Over Time",
-                                    f"% < {target_2_days} Days Over Time",
-                                    "Total Open Complaints",
-                                    "Age Distribution Over Time"))
-
-# Chart 1: % meeting target 1
-fig.add_trace(
-    go.Scatter(x=df['week'], y=df['pct_meeting_target_1'],
-               mode='lines+markers', name=f'% < {target_1_days} days',
-               line=dict(color='blue', width=2)),
-    row=1, col=1
-)
-fig.add_hline(y=target_1_pct, line_dash="dash", line_color="green",
-              annotation_text=f"{target_1_pct}% Target", row=1, col=1)
-
-# Chart 2: % meeting target 2
-fig.add_trace(
-    go.Scatter(x=df['week'], y=df['pct_meeting_target_2'],
-               mode='lines+markers', name=f'% < {target_2_days} days',
-               line=dict(color='purple', width=2)),
-    row=1, col=2
-)
-fig.add_hline(y=target_2_pct, line_dash="dash", line_color="green",
-              annotation_text=f"{target_2_pct}% Target", row=1, col=2)
-
-# Chart 3: Total open
-fig.add_trace(
-    go.Scatter(x=df['week'], y=df['total_open'],
-               mode='lines+markers', name='Total Open',
-               line=dict(color='orange', width=2)),
-    row=2, col=1
-)
 
-# Chart 4: Stacked area for distribution
-fig.add_trace(
-    go.Scatter(x=df['week'], y=df['bucket_1'],
-               fill='tozeroy', name=f'0-{target_1_days} days',
-               line=dict(color='green')),
-    row=2, col=2
-)
-fig.add_trace(
-    go.Scatter(x=df['week'], y=df['bucket_1'] + df['bucket_2'],
-               fill='tonexty', name=f'{target_1_days+1}-{target_2_days} days',
-               line=dict(color='yellow')),
-    row=2, col=2
-)
-fig.add_trace(
-    go.Scatter(x=df['week'], y=df['bucket_1'] + df['bucket_2'] + df['bucket_3'],
-               fill='tonexty', name=f'> {target_2_days} days',
-               line=dict(color='red')),
-    row=2, col=2
-)
+@st.cache_data(max_entries=64)
+def _figure_template(target_1_days, target_2_days, target_1_pct, target_2_pct):
+    """
+    Build the projection figure with empty traces and return it as a plain dict.
 
-fig.update_layout(height=600, showlegend=True)
-fig.update_xaxes(title_text="Week", row=2, col=1)
-fig.update_xaxes(title_text="Week", row=2, col=2)
-fig.update_yaxes(title_text="%", row=1, col=1)
-fig.update_yaxes(title_text="%", row=1, col=2)
-fig.update_yaxes(title_text="Count", row=2, col=1)
-fig.update_yaxes(title_text="Count", row=2, col=2)
+    Each run builds its own go.Figure from the template before filling in x/y,
+    so concurrent sessions never share a figure object.
+    """
+    fig = make_subplots(rows=2, cols=2,
+                        subplot_titles=(f"% < {target_1_days} Days Over Time",
+                                        f"% < {target_2_days} Days Over Time",
+                                        "Total Open Complaints",
+                                        "Age Distribution Over Time"))
+
+    # Chart 1: % meeting target 1
+    fig.add_trace(
+        go.Scatter(mode='lines+markers', name=f'% < {target_1_days} days',
+                   line=dict(color='blue', width=2)),
+        row=1, col=1
+    )
+    fig.add_hline(y=target_1_pct, line_dash="dash", line_color="green",
+                  annotation_text=f"{target_1_pct}% Target", row=1, col=1)
+
+    # Chart 2: % meeting target 2
+    fig.add_trace(
+        go.Scatter(mode='lines+markers', name=f'% < {target_2_days} days',
+                   line=dict(color='purple', width=2)),
+        row=1, col=2
+    )
+    fig.add_hline(y=target_2_pct, line_dash="dash", line_color="green",
+                  annotation_text=f"{target_2_pct}% Target", row=1, col=2)
+
+    # Chart 3: Total open
+    fig.add_trace(
+        go.Scatter(mode='lines+markers', name='Total Open',
+                   line=dict(color='orange', width=2)),
+        row=2, col=1
+    )
+
+    # Chart 4: Stacked area for distribution
+    fig.add_trace(
+        go.Scatter(fill='tozeroy', name=f'0-{target_1_days} days',
+                   line=dict(color='green')),
+        row=2, col=2
+    )
+    fig.add_trace(
+        go.Scatter(fill='tonexty', name=f'{target_1_days+1}-{target_2_days} days',
+                   line=dict(color='yellow')),
+        row=2, col=2
+    )
+    fig.add_trace(
+        go.Scatter(fill='tonexty', name=f'> {target_2_days} days',
+                   line=dict(color='red')),
+        row=2, col=2
+    )
+
+    fig.update_layout(height=600, showlegend=True)
+    fig.update_xaxes(title_text="Week", row=2, col=1)
+    fig.update_xaxes(title_text="Week", row=2, col=2)
+    fig.update_yaxes(title_text="%", row=1, col=1)
+    fig.update_yaxes(title_text="%", row=1, col=2)
+    fig.update_yaxes(title_text="Count", row=2, col=1)
+    fig.update_yaxes(title_text="Count", row=2, col=2)
+
+    return fig.to_dict()
+
+
+fig = go.Figure(_figure_template(target_1_days, target_2_days, target_1_pct, target_2_pct))
+stack = df[['bucket_1', 'bucket_2', 'bucket_3']].to_numpy().cumsum(axis=1)
+
+weeks_axis = df['week'].to_numpy()
+
+fig.update_traces(x=weeks_axis)
+fig.data[0].y = pct1_arr
+fig.data[1].y = pct2_arr
+fig.data[2].y = total_arr
+fig.data[3].y = stack[:, 0]
+fig.data[4].y = stack[:, 1]
+fig.data[5].y = stack[:, 2]
 
 st.plotly_chart(fig, use_container_width=True)
 
@@ -284,18 +209,39 @@ target_weeks = st.slider(
 )
 
 
-def find_required_closures(target_weeks, target_pct=target_1_pct):
-    for closures in range(weekly_opened, 1000):
-        test_df = simulate_aging(total_open, bucket_1_count, bucket_2_count, bucket_3_count,
-                                 weekly_opened, closures,
-                                 "Oldest First (Prioritize Aging)", target_weeks,
-                                 target_1_days, target_2_days)
-        if test_df.iloc[-1]['pct_meeting_target_1'] >= target_pct:
-            return closures
-    return None
+@st.cache_data(max_entries=256)
+def find_required_closures(target_weeks, target_pct,
+                           bucket_1_count, bucket_2_count, bucket_3_count,
+                           weekly_opened, target_1_days, target_2_days):
+    def meets_target(closures):
+        final_pct = final_pct_target_1(bucket_1_count, bucket_2_count, bucket_3_count,
+                                       weekly_opened, closures,
+                                       "Oldest First (Prioritize Aging)", target_weeks,
+                                       target_1_days, target_2_days)
+        return final_pct >= target_pct
+
+    # Final % only improves with more closures, so bisect for the smallest rate that works
+    lo, hi = weekly_opened, 999
+
+    # Closing everything on hand each week empties the backlog (100%), so that rate always works
+    clear_all = bucket_1_count + bucket_2_count + bucket_3_count + weekly_opened
+    if clear_all <= hi:
+        hi = clear_all
+    elif lo > hi or not meets_target(hi):
+        return None
+
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if meets_target(mid):
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
 
 
-required = find_required_closures(target_weeks)
+required = find_required_closures(target_weeks, target_1_pct,
+                                  bucket_1_count, bucket_2_count, bucket_3_count,
+                                  weekly_opened, target_1_days, target_2_days)
 
 if required:
     surplus = required - weekly_opened
@@ -312,21 +258,20 @@ else:
 
 # --- Data Table ---
 with st.expander("📋 View Simulation Data"):
-    display_df = df.rename(columns={
+    # Labels and rounding are applied at display time, without copying df
+    st.dataframe(df, column_config={
         'week': 'Week',
         'total_open': 'Total Open',
         'bucket_1': f'0-{target_1_days} days',
         'bucket_2': f'{target_1_days+1}-{target_2_days} days',
         'bucket_3': f'> {target_2_days} days',
-        'pct_meeting_target_1': f'% < {target_1_days} days',
-        'pct_meeting_target_2': f'% < {target_2_days} days'
+        'pct_meeting_target_1': st.column_config.NumberColumn(f'% < {target_1_days} days', format="%.1f"),
+        'pct_meeting_target_2': st.column_config.NumberColumn(f'% < {target_2_days} days', format="%.1f")
     })
-    st.dataframe(display_df.round(1))
 
 # --- Assumptions ---
 with st.expander("ℹ️ Model Assumptions"):
-    rate_1 = min(1.0, 7 / target_1_days) * 100
-    rate_2 = min(1.0, 7 / (target_2_days - target_1_days)) * 100
+    rate_1, rate_2 = (r * 100 for r in aging_rates(target_1_days, target_2_days))
     st.markdown(f"""
 **Aging Model:**
 - New complaints enter the 0-{target_1_days} day bucket
@@ -0,0 +1,164 @@
+from enum import IntEnum
+
+import pandas as pd
+import numpy as np
+from numba import njit, types
+
+
+class ClosureStrategy(IntEnum):
+    """Closure strategies as passed to the compiled kernel."""
+    OLDEST_FIRST = 0
+    NEWEST_FIRST = 1
+    MIXED = 2
+
+
+# Sidebar labels -> strategy, resolved once per simulation
+STRATEGY_IDS = {
+    "Oldest First (Prioritize Aging)": ClosureStrategy.OLDEST_FIRST,
+    "Newest First (FIFO)": ClosureStrategy.NEWEST_FIRST,
+    "Mixed (50/50)": ClosureStrategy.MIXED,
+}
+
+
+# Kept in its own module so Streamlit reruns of app.py reuse the compiled kernel
+@njit(types.UniTuple(types.int32[:], 3)(types.int32, types.int32, types.int32,
+                                        types.int32, types.int32, types.int32,
+                                        types.int32, types.float64, types.float64),
+      cache=True)
+def _simulate_core(bucket_1, bucket_2, bucket_3, weekly_opened, weekly_closed,
+                   strategy_id, weeks, rate_1_to_2, rate_2_to_3):
+    """
+    Run the weekly aging/intake/closure step and return the bucket counts per week.
+    """
+
+    b1 = np.empty(weeks + 1, np.int32)
+    b2 = np.empty(weeks + 1, np.int32)
+    b3 = np.empty(weeks + 1, np.int32)
+
+    for week in range(weeks + 1):
+        b1[week] = bucket_1
+        b2[week] = bucket_2
+        b3[week] = bucket_3
+
+        if week < weeks:
+            # Age existing complaints
+            aging_to_bucket_2 = int(bucket_1 * rate_1_to_2)
+            aging_to_bucket_3 = int(bucket_2 * rate_2_to_3)
+
+            bucket_1 -= aging_to_bucket_2
+            bucket_2 += aging_to_bucket_2 - aging_to_bucket_3
+            bucket_3 += aging_to_bucket_3
+
+            # Add new complaints (all start in bucket 1)
+            bucket_1 += weekly_opened
+
+            # Close complaints based on strategy
+            to_close = min(weekly_closed, bucket_1 + bucket_2 + bucket_3)
+
+            if strategy_id == ClosureStrategy.OLDEST_FIRST:
+                close_from_3 = min(to_close, bucket_3)
+                bucket_3 -= close_from_3
+                to_close -= close_from_3
+
+                close_from_2 = min(to_close, bucket_2)
+                bucket_2 -= close_from_2
+                to_close -= close_from_2
+
+                bucket_1 -= to_close
+
+            elif strategy_id == ClosureStrategy.NEWEST_FIRST:
+                close_from_1 = min(to_close, bucket_1)
+                bucket_1 -= close_from_1
+                to_close -= close_from_1
+
+                close_from_2 = min(to_close, bucket_2)
+                bucket_2 -= close_from_2
+                to_close -= close_from_2
+
+                bucket_3 -= to_close
+
+            else:  # ClosureStrategy.MIXED
+                total_current = bucket_1 + bucket_2 + bucket_3
+                if total_current > 0:
+                    # to_close <= total_current, so the floored shares never exceed
+                    # their buckets; only the remainder can overshoot bucket 3 by one
+                    close_1 = to_close * bucket_1 // total_current
+                    close_2 = to_close * bucket_2 // total_current
+                    close_3 = to_close - close_1 - close_2
+
+                    bucket_1 -= close_1
+                    bucket_2 -= close_2
+                    # Conditional expression lowers to cmov rather than a branch
+                    bucket_3 -= close_3 if close_3 < bucket_3 else bucket_3
+
+            # Ensure no negative values
+            bucket_1 = bucket_1 if bucket_1 > 0 else 0
+            bucket_2 = bucket_2 if bucket_2 > 0 else 0
+            bucket_3 = bucket_3 if bucket_3 > 0 else 0
+
+    return b1, b2, b3
+
+
+def aging_rates(target_1_days, target_2_days):
+    """Weekly fraction of bucket 1 aging into bucket 2, and of bucket 2 into bucket 3."""
+    rate_1_to_2 = min(1.0, 7 / target_1_days)
+    rate_2_to_3 = min(1.0, 7 / (target_2_days - target_1_days))
+    return rate_1_to_2, rate_2_to_3
+
+
+def pct_of_total(count, total):
+    """Percentage of total in float64, 100% for weeks with nothing open."""
+    return np.divide(count, total, out=np.ones(len(total)), where=total > 0) * 100
+
+
+def final_pct_target_1(bucket_1_init, bucket_2_init, bucket_3_init,
+                       weekly_opened, weekly_closed, closure_strategy, weeks,
+                       target_1_days=50, target_2_days=100):
+    """
+    Final-week % under Target #1, without building the full results DataFrame.
+    """
+
+    rate_1_to_2, rate_2_to_3 = aging_rates(target_1_days, target_2_days)
+
+    b1, b2, b3 = _simulate_core(bucket_1_init, bucket_2_init, bucket_3_init,
+                                weekly_opened, weekly_closed,
+                                int(STRATEGY_IDS[closure_strategy]), weeks,
+                                rate_1_to_2, rate_2_to_3)
+
+    total = b1[-1:] + b2[-1:] + b3[-1:]
+    return pct_of_total(b1[-1:], total)[0]
+
+
+def simulate_aging(total_open, bucket_1_init, bucket_2_init, bucket_3_init,
+                   weekly_opened, weekly_closed, closure_strategy, weeks,
+                   target_1_days=50, target_2_days=100):
+    """
+    Simulate complaint aging over time with dynamic age targets.
+
+    Buckets:
+    - Bucket 1: 0 to target_1_days
+    - Bucket 2: target_1_days+1 to target_2_days
+    - Bucket 3: > target_2_days
+    """
+
+    # Dynamic aging rates
+    rate_1_to_2, rate_2_to_3 = aging_rates(target_1_days, target_2_days)
+
+    b1, b2, b3 = _simulate_core(bucket_1_init, bucket_2_init, bucket_3_init,
+                                weekly_opened, weekly_closed,
+                                int(STRATEGY_IDS[closure_strategy]), weeks,
+                                rate_1_to_2, rate_2_to_3)
+
+    total = b1 + b2 + b3
+    pct_1 = pct_of_total(b1, total).astype(np.float32)
+    pct_2 = pct_of_total(b1 + b2, total).astype(np.float32)
+
+    return pd.DataFrame({
+        'week': np.arange(weeks + 1, dtype=np.int32),
+        'total_open': total,
+        'bucket_1': b1,
+        'bucket_2': b2,
+        'bucket_3': b3,
+        'pct_meeting_target_1': pct_1,
+        'pct_meeting_target_2': pct_2
+    })